@@ -1,6 +1,5 @@
+import asyncio
 import grpc
-from concurrent import futures
-import time
 import logging
 import simulation_pb2
 import simulation_pb2_grpc
@@ -9,20 +8,27 @@ import simulation_pb2_grpc
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger("LightingAgent")
 
+# so_reuseport lets extra agent replicas share the port; the stream cap
+# keeps one chatty client from exhausting the HTTP/2 connection
+GRPC_SERVER_OPTIONS = [
+    ('grpc.so_reuseport', 1),
+    ('grpc.max_concurrent_streams', 1000),
+]
+
 class AgentService(simulation_pb2_grpc.AgentServiceServicer):
-    def ExecuteCommand(self, request, context):
+    async def ExecuteCommand(self, request, context):
         logger.info(f"Received Command: {request.action} with params {request.parameters}")
-        # Simulate action execution
-        time.sleep(0.1)
+        # Simulate action execution without pinning an OS thread per RPC
+        await asyncio.sleep(0.1)
         return simulation_pb2.CommandResponse(success=True, message="Action executed")
 
-def serve():
-    server = grpc.server(futures.ThreadPoolExecutor(max_workers=10))
+async def serve():
+    server = grpc.aio.server(options=GRPC_SERVER_OPTIONS)
     simulation_pb2_grpc.add_AgentServiceServicer_to_server(AgentService(), server)
     server.add_insecure_port('[::]:50053')
     logger.info("Lighting Agent started on port 50053")
-    server.start()
-    server.wait_for_termination()
+    await server.start()
+    await server.wait_for_termination()
 
 if __name__ == '__main__':
-    serve()
+    asyncio.run(serve())
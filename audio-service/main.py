@@ -1,3 +1,4 @@
+import asyncio
 import time
 import grpc
 import simulation_pb2
@@ -13,44 +14,55 @@ logger = logging.getLogger("AudioService")
 CONTROLLER_HOST = os.environ.get('CONTROLLER_HOST', 'localhost')
 CONTROLLER_PORT = os.environ.get('CONTROLLER_PORT', '50051')
 
-def run():
-    logger.info(f"Connecting to controller at {CONTROLLER_HOST}:{CONTROLLER_PORT}...")
-    channel = grpc.insecure_channel(f'{CONTROLLER_HOST}:{CONTROLLER_PORT}')
-    stub = simulation_pb2_grpc.ControllerServiceStub(channel)
-
-    # Wait for controller to be ready
-    time.sleep(5) 
+CHANNEL_OPTIONS = [
+    ('grpc.keepalive_time_ms', 10000),
+]
 
+async def event_stream():
+    """Generate simulated audio events on one long-lived stream"""
     while True:
-        try:
-            # Simulate a beat event
-            beat_event = simulation_pb2.AudioEvent(
-                event_type="BEAT",
-                value=1.0,
-                timestamp=time.time(),
-                metadata={"intensity": "high"}
+        # Simulate a beat event
+        logger.info("Sending BEAT event")
+        yield simulation_pb2.AudioEvent(
+            event_type="BEAT",
+            value=1.0,
+            timestamp=time.time(),
+            metadata={"intensity": "high"}
+        )
+
+        await asyncio.sleep(0.5) # 120 BPM
+
+        # Simulate a pitch change occasionally
+        if random.random() < 0.2:
+            pitch_event = simulation_pb2.AudioEvent(
+                event_type="PITCH_CHANGE",
+                value=random.uniform(0.5, 2.0),
+                timestamp=time.time()
             )
-            logger.info("Sending BEAT event")
-            stub.PublishAudioEvent(beat_event)
-            
-            time.sleep(0.5) # 120 BPM
-
-            # Simulate a pitch change occasionally
-            if random.random() < 0.2:
-                pitch_event = simulation_pb2.AudioEvent(
-                    event_type="PITCH_CHANGE",
-                    value=random.uniform(0.5, 2.0),
-                    timestamp=time.time()
-                )
-                logger.info(f"Sending PITCH_CHANGE event: {pitch_event.value}")
-                stub.PublishAudioEvent(pitch_event)
-
-        except grpc.RpcError as e:
-            logger.error(f"RPC failed: {e}")
-            time.sleep(2)
-        except Exception as e:
-            logger.error(f"Error: {e}")
-            time.sleep(2)
+            logger.info(f"Sending PITCH_CHANGE event: {pitch_event.value}")
+            yield pitch_event
+
+async def run():
+    logger.info(f"Connecting to controller at {CONTROLLER_HOST}:{CONTROLLER_PORT}...")
+    async with grpc.aio.insecure_channel(
+        f'{CONTROLLER_HOST}:{CONTROLLER_PORT}', options=CHANNEL_OPTIONS
+    ) as channel:
+        stub = simulation_pb2_grpc.ControllerServiceStub(channel)
+
+        # Wait for controller to be ready
+        await asyncio.sleep(5)
+
+        while True:
+            try:
+                # All events ride one client-streaming RPC; the call only
+                # returns if the stream breaks, then we reconnect
+                await stub.PublishAudioStream(event_stream())
+            except grpc.RpcError as e:
+                logger.error(f"RPC failed: {e}")
+                await asyncio.sleep(2)
+            except Exception as e:
+                logger.error(f"Error: {e}")
+                await asyncio.sleep(2)
 
 if __name__ == '__main__':
-    run()
+    asyncio.run(run())
@@ -22,7 +22,21 @@ class CudaVisionProcessor:
         self.device = device
         self.use_cuda = device == "cuda" and torch.cuda.is_available()
         self.use_cupy = CUPY_AVAILABLE and self.use_cuda
-        
+
+        # Model input precision: FP16 on CUDA halves memory bandwidth and
+        # doubles tensor-core throughput for the downstream models
+        self.dtype = torch.float16 if self.use_cuda else torch.float32
+
+        # Persistent staging buffers, (re)allocated on first use: resizing
+        # into a fixed uint8 buffer, normalizing into pinned host memory and
+        # reusing one GPU tensor avoids per-frame allocations and lets the
+        # H2D copy run as DMA instead of a pageable transfer
+        self._buf_size: Optional[tuple] = None
+        self._resize_buf: Optional[np.ndarray] = None
+        self._pinned: Optional[torch.Tensor] = None
+        self._gpu: Optional[torch.Tensor] = None
+        self._copy_done: Optional[torch.cuda.Event] = None
+
         if self.use_cuda:
             print(f"CUDA Vision Processor initialized on {torch.cuda.get_device_name(0)}")
         else:
@@ -30,20 +44,43 @@ class CudaVisionProcessor:
     
     def preprocess_image(self, image: np.ndarray, target_size: tuple = (640, 480)) -> torch.Tensor:
         """Preprocess image for model input"""
-        # Resize
+        if self.use_cuda:
+            # Resize and normalize into persistent pinned staging buffers,
+            # then issue one async DMA copy into the reused GPU tensor.
+            # The returned tensor aliases that buffer, so it is only valid
+            # until the next frame is preprocessed; it is produced on the
+            # default stream, so consumers running on another stream must
+            # wait_stream() on it before reading.
+            w, h = target_size
+            self._ensure_buffers(h, w)
+
+            # The previous frame's async H2D copy must drain before the
+            # pinned buffer is overwritten - host-side writes are not
+            # ordered against the CUDA stream
+            if self._copy_done is not None:
+                self._copy_done.synchronize()
+
+            cv2.resize(image, target_size, dst=self._resize_buf)
+            np.divide(self._resize_buf, 255.0, out=self._pinned.numpy())
+            self._gpu.copy_(self._pinned, non_blocking=True)
+            self._copy_done.record()
+            return self._gpu.permute(2, 0, 1).unsqueeze(0)
+
+        # CPU path: resize and normalize to [0, 1]
         resized = cv2.resize(image, target_size)
-        
-        # Normalize to [0, 1]
         normalized = resized.astype(np.float32) / 255.0
-        
-        # Convert to tensor and move to device
-        tensor = torch.from_numpy(normalized).permute(2, 0, 1).unsqueeze(0)
-        
-        if self.use_cuda:
-            tensor = tensor.cuda()
-        
-        return tensor
-    
+        return torch.from_numpy(normalized).permute(2, 0, 1).unsqueeze(0)
+
+    def _ensure_buffers(self, h: int, w: int) -> None:
+        """Allocate the staging buffers once per input size"""
+        if self._buf_size != (h, w):
+            self._resize_buf = np.empty((h, w, 3), dtype=np.uint8)
+            self._pinned = torch.empty((h, w, 3), dtype=torch.float32, pin_memory=True)
+            # The non-blocking copy casts the pinned FP32 data on upload
+            self._gpu = torch.empty((h, w, 3), dtype=self.dtype, device="cuda")
+            self._copy_done = torch.cuda.Event()
+            self._buf_size = (h, w)
+
     def gaussian_blur(self, image: np.ndarray, kernel_size: int = 5) -> np.ndarray:
         """Apply Gaussian blur using CUDA if available"""
         if self.use_cupy:
@@ -62,7 +99,15 @@ class CudaVisionProcessor:
         return cv2.Canny(gray, 100, 200)
     
     def cleanup(self):
-        """Cleanup CUDA resources"""
-        if self.use_cuda:
-            torch.cuda.empty_cache()
+        """Cleanup CUDA resources.
+
+        Deliberately does not call torch.cuda.empty_cache(): returning
+        cached blocks to the driver just forces expensive re-mallocs, and
+        the process is exiting anyway.
+        """
+        self._resize_buf = None
+        self._pinned = None
+        self._gpu = None
+        self._copy_done = None
+        self._buf_size = None
 
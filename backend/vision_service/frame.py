@@ -0,0 +1,35 @@
+"""
+Frame Context - per-frame container shared read-only across detectors
+"""
+
+from dataclasses import dataclass, field
+from typing import Optional
+
+import cv2
+import numpy as np
+
+
+@dataclass
+class FrameContext:
+    """One decoded frame with a lazily cached RGB conversion.
+
+    The BGR frame is decoded exactly once per WebSocket message; the RGB
+    conversion (for the MediaPipe consumers) is computed on first access
+    and cached, so the O(H*W*3) copy happens at most once regardless of
+    how many detectors run on the frame. Consumers treat all views as
+    read-only.
+    """
+
+    bgr: np.ndarray
+    _rgb: Optional[np.ndarray] = field(default=None, repr=False)
+
+    @property
+    def shape(self) -> tuple:
+        return self.bgr.shape
+
+    @property
+    def rgb(self) -> np.ndarray:
+        """RGB view of the frame, converted once on first access"""
+        if self._rgb is None:
+            self._rgb = cv2.cvtColor(self.bgr, cv2.COLOR_BGR2RGB)
+        return self._rgb
@@ -0,0 +1,46 @@
+"""
+ONNX Utilities - shared helpers for the ONNX landmark model paths
+"""
+
+import logging
+from pathlib import Path
+
+import numpy as np
+
+try:
+    import onnx
+    from onnxconverter_common import float16
+    FP16_CONVERTER_AVAILABLE = True
+except ImportError:
+    FP16_CONVERTER_AVAILABLE = False
+    onnx = None
+    float16 = None
+
+logger = logging.getLogger(__name__)
+
+
+def fp16_model_path(model_path: str) -> str:
+    """Return the path of an FP16 copy of the model, converting once.
+
+    The converted model is cached next to the original; falls back to the
+    FP32 model when onnxconverter-common is unavailable or the conversion
+    fails.
+    """
+    if not FP16_CONVERTER_AVAILABLE:
+        return model_path
+
+    fp16_path = Path(model_path).with_suffix(".fp16.onnx")
+    try:
+        if not fp16_path.exists():
+            model = onnx.load(model_path)
+            onnx.save(float16.convert_float_to_float16(model), str(fp16_path))
+            logger.info(f"Converted {model_path} to FP16 at {fp16_path}")
+        return str(fp16_path)
+    except Exception as e:
+        logger.warning(f"FP16 conversion failed for {model_path}, using FP32: {e}")
+        return model_path
+
+
+def session_input_dtype(session) -> np.dtype:
+    """numpy dtype matching the session's first input tensor"""
+    return np.float16 if session.get_inputs()[0].type == "tensor(float16)" else np.float32
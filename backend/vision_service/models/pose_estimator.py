@@ -2,6 +2,11 @@
 Pose Estimator - MediaPipe Pose with CUDA acceleration
 """
 
+import asyncio
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+
 import cv2
 import numpy as np
 import torch
@@ -14,6 +19,44 @@ except ImportError:
     MEDIAPIPE_AVAILABLE = False
     mp = None
 
+try:
+    import onnxruntime as ort
+    ONNXRUNTIME_AVAILABLE = True
+except ImportError:
+    ONNXRUNTIME_AVAILABLE = False
+    ort = None
+
+from vision_service.models.onnx_utils import fp16_model_path, session_input_dtype
+
+logger = logging.getLogger(__name__)
+
+# Input size of the pose landmark model (see MediaPipe pose_landmark_full)
+LANDMARK_INPUT_SIZE = 256
+
+# Minimum mean landmark presence score for an ONNX detection to count as
+# a pose
+PRESENCE_THRESHOLD = 0.5
+
+# Column indices into the (33, 4) landmark array
+X, Y, Z, VIS = 0, 1, 2, 3
+
+# Rows of the landmark array surfaced as named key points
+KEY_POINT_INDICES = {
+    "nose": 0,
+    "leftShoulder": 11,
+    "rightShoulder": 12,
+    "leftElbow": 13,
+    "rightElbow": 14,
+    "leftWrist": 15,
+    "rightWrist": 16,
+    "leftHip": 23,
+    "rightHip": 24,
+    "leftKnee": 25,
+    "rightKnee": 26,
+    "leftAnkle": 27,
+    "rightAnkle": 28,
+}
+
 
 class PoseEstimator:
     """MediaPipe Pose estimator with CUDA support"""
@@ -34,66 +77,136 @@ class PoseEstimator:
             min_detection_confidence=0.5,
             min_tracking_confidence=0.5,
         )
-    
+
+        # Single-worker executor so blocking inference runs off the event
+        # loop; one worker because the MediaPipe graph is not thread-safe
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="pose_estimator")
+
+        # Optional ONNX landmark model: MediaPipe Python runs tflite on CPU
+        # only; an ONNX export set via POSE_LANDMARK_ONNX runs on the CUDA
+        # execution provider instead, with MediaPipe as the fallback.
+        self.landmark_session = None
+        self._landmark_dtype = np.float32
+        landmark_model = os.environ.get("POSE_LANDMARK_ONNX")
+        if landmark_model and ONNXRUNTIME_AVAILABLE:
+            try:
+                if self.use_cuda:
+                    # FP16 halves memory bandwidth and engages tensor cores
+                    landmark_model = fp16_model_path(landmark_model)
+                providers = (
+                    ["CUDAExecutionProvider", "CPUExecutionProvider"]
+                    if self.use_cuda
+                    else ["CPUExecutionProvider"]
+                )
+                self.landmark_session = ort.InferenceSession(landmark_model, providers=providers)
+                self._landmark_dtype = session_input_dtype(self.landmark_session)
+                logger.info(f"ONNX pose landmark model loaded from {landmark_model} ({self.landmark_session.get_providers()[0]})")
+            except Exception as e:
+                logger.warning(f"Failed to load ONNX pose landmark model, using MediaPipe: {e}")
+
+    def _detect_onnx(self, image: np.ndarray) -> Optional[np.ndarray]:
+        """Run the pose landmark model on the full frame via ONNX Runtime.
+
+        Returns a (33, 4) landmark array (x, y, z, visibility columns), or
+        None when no pose is present or inference fails - the caller then
+        falls back to the MediaPipe graph, which keeps the
+        "no pose -> null" contract on both backends.
+        """
+        crop = cv2.resize(image, (LANDMARK_INPUT_SIZE, LANDMARK_INPUT_SIZE))
+        batch = (crop.astype(self._landmark_dtype) / 255.0).transpose(2, 0, 1)[np.newaxis]
+
+        try:
+            input_name = self.landmark_session.get_inputs()[0].name
+            outputs = self.landmark_session.run(None, {input_name: batch})
+        except Exception as e:
+            logger.warning(f"ONNX pose landmark inference failed: {e}")
+            return None
+
+        # First output: 5 values per landmark (x, y, z in crop pixel space,
+        # visibility and presence logits); only the 33 body landmarks are kept
+        raw = outputs[0].reshape(-1, 5)[:33]
+
+        # Presence column gates the detection: without it an empty frame
+        # would yield a fabricated skeleton that keeps steering the rocket
+        presence = raw[:, 4].astype(np.float32)
+        if presence.size and (presence.min() < 0.0 or presence.max() > 1.0):
+            presence = 1.0 / (1.0 + np.exp(-presence))  # logits -> scores
+        if float(presence.mean()) < PRESENCE_THRESHOLD:
+            return None
+
+        pts = np.empty((raw.shape[0], 4), dtype=np.float32)
+        pts[:, :VIS] = raw[:, :3] / LANDMARK_INPUT_SIZE
+        pts[:, VIS] = 1.0 / (1.0 + np.exp(-raw[:, 3]))  # sigmoid
+
+        return pts
+
     async def detect(self, image: np.ndarray) -> Optional[Dict]:
-        """Detect pose in image"""
-        # MediaPipe expects RGB
-        if len(image.shape) == 3 and image.shape[2] == 3:
-            rgb_image = cv2.cvtColor(image, cv2.COLOR_RGB2BGR) if image.dtype == np.uint8 else image
-        else:
-            rgb_image = image
-        
-        # Process with MediaPipe
-        results = self.pose.process(rgb_image)
+        """Detect pose in an RGB image"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, self._detect_sync, image)
+
+    def _detect_sync(self, image: np.ndarray) -> Optional[Dict]:
+        """Blocking detection, run on the estimator's executor thread"""
+        # ONNX/CUDA fast path
+        if self.landmark_session is not None:
+            landmarks = self._detect_onnx(image)
+            if landmarks is not None:
+                return self._build_pose_data(landmarks)
+
+        # Process with MediaPipe (caller supplies an RGB frame; the server
+        # converts from BGR exactly once per frame)
+        results = self.pose.process(image)
         
         if not results.pose_landmarks:
             return None
-        
-        # Extract landmarks
-        landmarks = []
-        for landmark in results.pose_landmarks.landmark:
-            landmarks.append({
-                "x": landmark.x,
-                "y": landmark.y,
-                "z": landmark.z,
-                "visibility": landmark.visibility,
-            })
-        
-        # Calculate key points
-        key_points = {
-            "nose": landmarks[0],
-            "leftShoulder": landmarks[11],
-            "rightShoulder": landmarks[12],
-            "leftElbow": landmarks[13],
-            "rightElbow": landmarks[14],
-            "leftWrist": landmarks[15],
-            "rightWrist": landmarks[16],
-            "leftHip": landmarks[23],
-            "rightHip": landmarks[24],
-            "leftKnee": landmarks[25],
-            "rightKnee": landmarks[26],
-            "leftAnkle": landmarks[27],
-            "rightAnkle": landmarks[28],
-        }
-        
+
+        # Extract landmarks as one (33, 4) array - a single allocation
+        # instead of 33 per-landmark dicts
+        pts = np.asarray(
+            [(lm.x, lm.y, lm.z, lm.visibility) for lm in results.pose_landmarks.landmark],
+            dtype=np.float32,
+        )
+
+        return self._build_pose_data(pts)
+
+    def _build_pose_data(self, pts: np.ndarray) -> Dict:
+        """Assemble the pose payload from a (33, 4) landmark array.
+
+        Landmarks are extracted and reduced as one contiguous array; the
+        payload expands back to the client contract's named
+        {x, y, z, visibility} objects only at the serialization boundary.
+        """
+        landmarks = [
+            {
+                "x": float(p[X]),
+                "y": float(p[Y]),
+                "z": float(p[Z]),
+                "visibility": float(p[VIS]),
+            }
+            for p in pts
+        ]
+        key_points = {name: landmarks[idx] for name, idx in KEY_POINT_INDICES.items()}
+
         # Calculate pose angles and positions
         pose_data = {
             "landmarks": landmarks,
             "keyPoints": key_points,
             "headPosition": {
-                "x": landmarks[0]["x"],
-                "y": landmarks[0]["y"],
+                "x": float(pts[0, X]),
+                "y": float(pts[0, Y]),
             },
             "bodyCenter": {
-                "x": (landmarks[11]["x"] + landmarks[12]["x"]) / 2,
-                "y": (landmarks[11]["y"] + landmarks[12]["y"]) / 2,
+                "x": float(pts[11, X] + pts[12, X]) / 2,
+                "y": float(pts[11, Y] + pts[12, Y]) / 2,
             },
         }
-        
+
         return pose_data
     
     def cleanup(self):
         """Cleanup resources"""
+        if hasattr(self, "_executor"):
+            self._executor.shutdown(wait=False)
         if hasattr(self, "pose"):
             self.pose.close()
 
@@ -7,14 +7,36 @@ import asyncio
 import base64
 import json
 import logging
+import os
 from typing import Optional
+
+# Must be set before torch is imported: expandable segments keep the CUDA
+# caching allocator from fragmenting over long WebSocket sessions
+os.environ.setdefault("PYTORCH_CUDA_ALLOC_CONF", "expandable_segments:True")
+
 import cv2
 import numpy as np
 from fastapi import FastAPI, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
 import torch
 
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+    orjson = None
+
+try:
+    import uvloop
+    UVLOOP_AVAILABLE = True
+except ImportError:
+    UVLOOP_AVAILABLE = False
+    uvloop = None
+
 from vision_service.cuda_processor import CudaVisionProcessor
+from vision_service.frame import FrameContext
+from vision_service.mediapipe_pool import MediaPipePool
 from vision_service.models.hand_tracker import HandTracker
 from vision_service.models.yolo_detector import YOLODetector
 from vision_service.models.pose_estimator import PoseEstimator
@@ -33,18 +55,24 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Default temporal subsampling for the heavier detectors (overridable per
+# connection via the config message)
+DEFAULT_OBJECT_STRIDE = 3
+DEFAULT_POSE_STRIDE = 5
+
 # Global processor instances
 vision_processor: Optional[CudaVisionProcessor] = None
 hand_tracker: Optional[HandTracker] = None
 yolo_detector: Optional[YOLODetector] = None
 pose_estimator: Optional[PoseEstimator] = None
+mediapipe_pool: Optional[MediaPipePool] = None
 
 
 @app.on_event("startup")
 async def startup_event():
     """Initialize CUDA processors on startup"""
-    global vision_processor, hand_tracker, yolo_detector, pose_estimator
-    
+    global vision_processor, hand_tracker, yolo_detector, pose_estimator, mediapipe_pool
+
     logger.info("Initializing Vision Service...")
     
     # Check CUDA availability
@@ -60,11 +88,22 @@ async def startup_event():
         # Initialize CUDA processor
         vision_processor = CudaVisionProcessor(device=device)
         
-        # Initialize models
-        hand_tracker = HandTracker(device=device)
+        # Initialize models. On CPU, MediaPipe can optionally run in a
+        # process pool (VISION_PROCESS_POOL=1) to escape the GIL - the
+        # workers own the graphs, so no in-process trackers are built.
+        use_pool = (
+            device == "cpu"
+            and os.environ.get("VISION_PROCESS_POOL", "").lower() in ("1", "true", "yes")
+        )
+        if use_pool:
+            mediapipe_pool = MediaPipePool(device=device)
+            logger.info("MediaPipe running in a dedicated process pool")
+        else:
+            hand_tracker = HandTracker(device=device)
+            pose_estimator = PoseEstimator(device=device)
+
         yolo_detector = YOLODetector(device=device)
-        pose_estimator = PoseEstimator(device=device)
-        
+
         logger.info("Vision Service initialized successfully")
     except Exception as e:
         logger.error(f"Failed to initialize Vision Service: {e}", exc_info=True)
@@ -74,10 +113,10 @@ async def startup_event():
 @app.on_event("shutdown")
 async def shutdown_event():
     """Cleanup on shutdown"""
-    global vision_processor, hand_tracker, yolo_detector, pose_estimator
-    
+    global vision_processor, hand_tracker, yolo_detector, pose_estimator, mediapipe_pool
+
     logger.info("Shutting down Vision Service...")
-    
+
     if vision_processor:
         vision_processor.cleanup()
     if hand_tracker:
@@ -86,98 +125,226 @@ async def shutdown_event():
         yolo_detector.cleanup()
     if pose_estimator:
         pose_estimator.cleanup()
+    if mediapipe_pool:
+        mediapipe_pool.cleanup()
+
+
+def loads_message(data: str) -> dict:
+    """Parse an incoming JSON message (orjson when available)"""
+    if ORJSON_AVAILABLE:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+async def send_message(websocket: WebSocket, payload: dict) -> None:
+    """Serialize and send a JSON message (orjson when available).
 
+    orjson serializes numpy arrays natively, so landmark arrays go out
+    without an intermediate .tolist() conversion.
+    """
+    if ORJSON_AVAILABLE:
+        await websocket.send_bytes(orjson.dumps(payload, option=orjson.OPT_SERIALIZE_NUMPY))
+    else:
+        await websocket.send_text(json.dumps(payload, default=_json_default))
 
-def decode_image(base64_image: str) -> np.ndarray:
-    """Decode base64 image to numpy array"""
+
+def _json_default(obj):
+    """stdlib-json fallback for numpy arrays and scalars"""
+    if hasattr(obj, "tolist"):
+        return obj.tolist()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def decode_image_bytes(image_data: bytes) -> np.ndarray:
+    """Decode raw JPEG/PNG bytes to a BGR numpy array.
+
+    The frame stays in OpenCV-native BGR; process_frame converts to RGB
+    exactly once for the MediaPipe consumers.
+    """
     try:
-        image_data = base64.b64decode(base64_image)
         nparr = np.frombuffer(image_data, np.uint8)
-        image = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
-        return cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+        return cv2.imdecode(nparr, cv2.IMREAD_COLOR)
     except Exception as e:
         logger.error(f"Failed to decode image: {e}")
         raise
 
 
+async def _none():
+    """Placeholder awaitable for detectors that are disabled this frame"""
+    return None
+
+
+async def process_frame(frame: FrameContext, message: dict, frame_index: int = 0, config: Optional[dict] = None) -> dict:
+    """Run the detection pipeline on a decoded frame.
+
+    The heavier detectors are temporally subsampled: YOLO runs every
+    objectStride-th frame and pose every poseStride-th, so hands (the
+    control path) stay at full rate while total GPU work drops ~3x.
+    """
+    config = config or {}
+    object_stride = max(1, int(config.get("objectStride", DEFAULT_OBJECT_STRIDE)))
+    pose_stride = max(1, int(config.get("poseStride", DEFAULT_POSE_STRIDE)))
+
+    results = {
+        "type": "detection",
+        "timestamp": message.get("timestamp"),
+        "hands": [],
+        "objects": [],
+        "pose": None,
+        "control": None,
+    }
+
+    want_objects = (
+        yolo_detector is not None
+        and message.get("detectObjects", False)
+        and frame_index % object_stride == 0
+    )
+    hands_available = hand_tracker is not None or mediapipe_pool is not None
+    want_pose = (
+        (pose_estimator is not None or mediapipe_pool is not None)
+        and message.get("detectPose", False)
+        and frame_index % pose_stride == 0
+    )
+
+    # The FrameContext caches the BGR->RGB conversion on first access, so
+    # the MediaPipe consumers share one copy; YOLO takes the native BGR frame
+
+    # MediaPipe runs either in-process (executor threads) or, on CPU, in a
+    # process pool that reads the frame from shared memory
+    if mediapipe_pool is not None and (hands_available or want_pose):
+        shm_name, shape = mediapipe_pool.publish_frame(frame.rgb)
+        hands_coro = mediapipe_pool.detect_hands(shm_name, shape)
+        pose_coro = mediapipe_pool.detect_pose(shm_name, shape) if want_pose else _none()
+    else:
+        hands_coro = hand_tracker.detect(frame.rgb) if hand_tracker else _none()
+        pose_coro = pose_estimator.detect(frame.rgb) if want_pose else _none()
+
+    # Run the independent detectors concurrently - each one executes on its
+    # own thread/process/CUDA stream, so the GPU overlaps their kernels
+    # instead of idling between sequential awaits
+    hands, objects, pose = await asyncio.gather(
+        hands_coro,
+        yolo_detector.detect(frame.bgr) if want_objects else _none(),
+        pose_coro,
+    )
+
+    # Hand tracking
+    if hands:
+        results["hands"] = [
+            {
+                # ndarray end-to-end; orjson serializes it natively
+                "landmarks": hand["landmarks"],
+                "handedness": hand["handedness"],
+                "confidence": float(hand["confidence"]),
+                "boundingBox": {
+                    "x": float(hand["boundingBox"]["x"]),
+                    "y": float(hand["boundingBox"]["y"]),
+                    "width": float(hand["boundingBox"]["width"]),
+                    "height": float(hand["boundingBox"]["height"]),
+                },
+            }
+            for hand in hands
+        ]
+
+    # Object detection (YOLO)
+    if objects is not None:
+        results["objects"] = objects
+
+    # Pose estimation
+    results["pose"] = pose
+
+    # Calculate control signal from hands
+    if results["hands"]:
+        primary_hand = results["hands"][0]
+        control = calculate_control_signal(primary_hand, frame.shape)
+        results["control"] = control
+
+    return results
+
+
 @app.websocket("/ws/vision")
 async def websocket_vision(websocket: WebSocket):
-    """WebSocket endpoint for vision processing"""
+    """WebSocket endpoint for vision processing.
+
+    Receiving and inference run as separate tasks joined by a
+    maxsize-1 queue that drops stale frames, so end-to-end latency is
+    capped at one inference period instead of growing unbounded when the
+    client sends faster than the models can process.
+    """
     await websocket.accept()
     logger.info("WebSocket client connected")
-    
-    try:
-        while True:
-            # Receive message
-            data = await websocket.receive_text()
-            message = json.loads(data)
-            
-            if message.get("type") == "frame":
-                # Process frame
-                frame_data = message.get("data")
-                if not frame_data:
+
+    frame_queue: asyncio.Queue = asyncio.Queue(maxsize=1)
+    config = {"objectStride": DEFAULT_OBJECT_STRIDE, "poseStride": DEFAULT_POSE_STRIDE}
+
+    def enqueue_latest(item) -> None:
+        """Put item on the queue, displacing any stale frame"""
+        if frame_queue.full():
+            try:
+                frame_queue.get_nowait()
+            except asyncio.QueueEmpty:
+                pass
+        frame_queue.put_nowait(item)
+
+    async def producer():
+        """Drain the socket: queue frames, answer ping/config inline"""
+        # Header describing subsequent binary frames (timestamp, detect flags)
+        frame_header: dict = {}
+
+        try:
+            while True:
+                # Receive message - binary frames carry raw JPEG bytes, text
+                # frames carry JSON (legacy base64 frames, ping, config)
+                packet = await websocket.receive()
+                if packet["type"] == "websocket.disconnect":
+                    break
+
+                if packet.get("bytes") is not None:
+                    # Binary frame: raw JPEG bytes, no base64 overhead
+                    enqueue_latest((packet["bytes"], frame_header))
                     continue
-                
-                # Decode image
-                image = decode_image(frame_data)
-                
-                # Process with CUDA
-                results = {
-                    "type": "detection",
-                    "timestamp": message.get("timestamp"),
-                    "hands": [],
-                    "objects": [],
-                    "pose": None,
-                    "control": None,
-                }
-                
-                # Hand tracking
-                if hand_tracker:
-                    hands = await hand_tracker.detect(image)
-                    results["hands"] = [
-                        {
-                            "landmarks": hand["landmarks"].tolist() if hasattr(hand["landmarks"], "tolist") else hand["landmarks"],
-                            "handedness": hand["handedness"],
-                            "confidence": float(hand["confidence"]),
-                            "boundingBox": {
-                                "x": float(hand["boundingBox"]["x"]),
-                                "y": float(hand["boundingBox"]["y"]),
-                                "width": float(hand["boundingBox"]["width"]),
-                                "height": float(hand["boundingBox"]["height"]),
-                            },
-                        }
-                        for hand in hands
-                    ]
-                
-                # Object detection (YOLO)
-                if yolo_detector and message.get("detectObjects", False):
-                    objects = await yolo_detector.detect(image)
-                    results["objects"] = objects
-                
-                # Pose estimation
-                if pose_estimator and message.get("detectPose", False):
-                    pose = await pose_estimator.detect(image)
-                    results["pose"] = pose
-                
-                # Calculate control signal from hands
-                if results["hands"]:
-                    primary_hand = results["hands"][0]
-                    control = calculate_control_signal(primary_hand, image.shape)
-                    results["control"] = control
-                
-                # Send results
-                await websocket.send_json(results)
-            
-            elif message.get("type") == "ping":
-                # Health check
-                await websocket.send_json({"type": "pong", "timestamp": message.get("timestamp")})
-            
-            elif message.get("type") == "config":
-                # Update configuration
-                config = message.get("config", {})
-                # Apply config updates here
-                await websocket.send_json({"type": "config_ack", "config": config})
-    
+
+                message = loads_message(packet["text"])
+
+                if message.get("type") == "frame_header":
+                    # Header for following binary frames
+                    frame_header = message
+
+                elif message.get("type") == "frame":
+                    # Legacy text frame with base64 payload
+                    frame_data = message.get("data")
+                    if frame_data:
+                        enqueue_latest((base64.b64decode(frame_data), message))
+
+                elif message.get("type") == "ping":
+                    # Health check
+                    await send_message(websocket, {"type": "pong", "timestamp": message.get("timestamp")})
+
+                elif message.get("type") == "config":
+                    # Update configuration (e.g. objectStride / poseStride)
+                    config.update(message.get("config", {}))
+                    await send_message(websocket, {"type": "config_ack", "config": message.get("config", {})})
+        finally:
+            # Wake the consumer so it can exit
+            enqueue_latest(None)
+
+    async def consumer():
+        """Decode and process the freshest queued frame"""
+        frame_index = 0
+        while True:
+            item = await frame_queue.get()
+            if item is None:
+                break
+
+            raw_bytes, header = item
+            frame = FrameContext(decode_image_bytes(raw_bytes))
+            results = await process_frame(frame, header, frame_index, config)
+            await send_message(websocket, results)
+            frame_index += 1
+
+    try:
+        await asyncio.gather(producer(), consumer())
+        logger.info("WebSocket client disconnected")
     except WebSocketDisconnect:
         logger.info("WebSocket client disconnected")
     except Exception as e:
@@ -187,29 +354,28 @@ async def websocket_vision(websocket: WebSocket):
 
 def calculate_control_signal(hand: dict, image_shape: tuple) -> dict:
     """Calculate rocket control signal from hand detection"""
-    landmarks = hand["landmarks"]
-    
-    # Calculate hand center (normalized 0-1)
-    center_x = sum(l[0] for l in landmarks) / len(landmarks)
-    center_y = sum(l[1] for l in landmarks) / len(landmarks)
-    
+    pts = np.asarray(hand["landmarks"], dtype=np.float32)
+
+    # Hand center (normalized 0-1) in one vectorized reduction
+    center = pts.mean(axis=0)
+
     # Map to direction (-1 to 1)
     direction = {
-        "x": (center_x - 0.5) * 2,  # -1 (left) to 1 (right)
-        "y": (0.5 - center_y) * 2,  # -1 (down) to 1 (up)
+        "x": float(center[0] - 0.5) * 2,  # -1 (left) to 1 (right)
+        "y": float(0.5 - center[1]) * 2,  # -1 (down) to 1 (up)
     }
-    
+
     # Calculate distance from camera (estimated from z coordinates)
-    avg_z = sum(l[2] for l in landmarks) / len(landmarks) if len(landmarks[0]) > 2 else 0
+    avg_z = float(center[2]) if pts.shape[1] > 2 else 0
     thrust = max(0, min(1, 1 - (avg_z + 0.5)))
-    
+
     # Detect gesture (simplified)
     action = "IDLE"
-    if len(landmarks) >= 21:
+    if len(pts) >= 21:
         # Simple gesture detection based on finger positions
         # This is a placeholder - implement proper gesture recognition
         action = "BOOST" if thrust > 0.7 else "IDLE"
-    
+
     return {
         "direction": direction,
         "thrust": float(thrust),
@@ -226,14 +392,24 @@ async def health_check():
         "cuda_available": cuda_available,
         "device": "cuda" if cuda_available else "cpu",
         "models_loaded": {
-            "hand_tracker": hand_tracker is not None,
+            "hand_tracker": hand_tracker is not None or mediapipe_pool is not None,
             "yolo_detector": yolo_detector is not None,
-            "pose_estimator": pose_estimator is not None,
+            "pose_estimator": pose_estimator is not None or mediapipe_pool is not None,
         },
     }
 
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8766)
+
+    if UVLOOP_AVAILABLE:
+        uvloop.install()
+
+    uvicorn.run(
+        app,
+        host="0.0.0.0",
+        port=8766,
+        loop="uvloop" if UVLOOP_AVAILABLE else "auto",
+        http="httptools",
+    )
 
@@ -1,7 +1,7 @@
 // WebSocket client for CUDA vision backend
 
 export interface VisionBackendMessage {
-  type: "frame" | "ping" | "config" | "detection" | "pong" | "config_ack" | "error";
+  type: "frame" | "frame_header" | "ping" | "config" | "detection" | "pong" | "config_ack" | "error";
   data?: string; // base64 encoded image
   timestamp?: number;
   detectObjects?: boolean;
@@ -66,6 +66,8 @@ export class VisionBackendClient {
 
       try {
         this.ws = new WebSocket(this.url);
+        // Server may send JSON as binary frames (orjson)
+        this.ws.binaryType = "arraybuffer";
 
         this.ws.onopen = () => {
           console.log("[Vision Backend] Connected");
@@ -77,7 +79,11 @@ export class VisionBackendClient {
 
         this.ws.onmessage = (event) => {
           try {
-            const message: VisionBackendMessage = JSON.parse(event.data);
+            const text =
+              typeof event.data === "string"
+                ? event.data
+                : new TextDecoder().decode(event.data);
+            const message: VisionBackendMessage = JSON.parse(text);
             this.handleMessage(message);
           } catch (e) {
             console.error("[Vision Backend] Failed to parse message:", e);
@@ -131,7 +137,8 @@ export class VisionBackendClient {
       return;
     }
 
-    // Convert ImageData to base64
+    // Encode to JPEG and send as a binary frame (header JSON + raw bytes)
+    // to avoid the 33% base64 inflation and server-side decode overhead
     const canvas = document.createElement("canvas");
     canvas.width = imageData.width;
     canvas.height = imageData.height;
@@ -139,17 +146,30 @@ export class VisionBackendClient {
     if (!ctx) return;
 
     ctx.putImageData(imageData, 0, 0);
-    const base64 = canvas.toDataURL("image/jpeg", 0.8).split(",")[1];
-
-    const message: VisionBackendMessage = {
-      type: "frame",
-      data: base64,
-      timestamp: Date.now(),
-      detectObjects,
-      detectPose,
-    };
+    canvas.toBlob(
+      (blob) => {
+        if (!blob || !this.ws || this.ws.readyState !== WebSocket.OPEN) return;
+
+        const header: VisionBackendMessage = {
+          type: "frame_header",
+          timestamp: Date.now(),
+          detectObjects,
+          detectPose,
+        };
 
-    this.ws.send(JSON.stringify(message));
+        blob.arrayBuffer().then((buffer) => {
+          if (this.ws && this.ws.readyState === WebSocket.OPEN) {
+            // Send the header back-to-back with its payload - the server
+            // pairs each binary frame with the last-seen header, so the
+            // two sends must not interleave with another frame's
+            this.ws.send(JSON.stringify(header));
+            this.ws.send(buffer);
+          }
+        });
+      },
+      "image/jpeg",
+      0.8
+    );
   }
 
   ping(): void {
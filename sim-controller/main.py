@@ -10,6 +10,13 @@ import simulation_pb2_grpc
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger("SimController")
 
+# so_reuseport lets extra controller replicas share the port; the stream
+# cap keeps one chatty client from exhausting the HTTP/2 connection
+GRPC_SERVER_OPTIONS = [
+    ('grpc.so_reuseport', 1),
+    ('grpc.max_concurrent_streams', 1000),
+]
+
 ROBOT_AGENT_HOST = os.environ.get('ROBOT_AGENT_HOST', 'localhost')
 ROBOT_AGENT_PORT = os.environ.get('ROBOT_AGENT_PORT', '50052')
 LIGHTING_AGENT_HOST = os.environ.get('LIGHTING_AGENT_HOST', 'localhost')
@@ -37,6 +44,12 @@ class ControllerService(simulation_pb2_grpc.ControllerServiceServicer):
         
         return simulation_pb2.EventResponse(success=True)
 
+    def PublishAudioStream(self, request_iterator, context):
+        # Client-streaming variant: route each event as it arrives
+        for request in request_iterator:
+            self.PublishAudioEvent(request, context)
+        return simulation_pb2.EventResponse(success=True)
+
     def _send_command(self, stub, agent_name, action, params):
         try:
             command = simulation_pb2.SimulationCommand(
@@ -50,7 +63,13 @@ class ControllerService(simulation_pb2_grpc.ControllerServiceServicer):
             logger.error(f"Failed to send command to {agent_name}: {e}")
 
 def serve():
-    server = grpc.server(futures.ThreadPoolExecutor(max_workers=10))
+    # Handlers are I/O-bound (each blocks on a downstream agent RPC), so
+    # the fixed pool is sized well past core count; a cached executor
+    # would thrash on context switches instead
+    server = grpc.server(
+        futures.ThreadPoolExecutor(max_workers=(os.cpu_count() or 1) * 4, thread_name_prefix='grpc'),
+        options=GRPC_SERVER_OPTIONS,
+    )
     simulation_pb2_grpc.add_ControllerServiceServicer_to_server(ControllerService(), server)
     server.add_insecure_port('[::]:50051')
     logger.info("Controller Service started on port 50051")